@@ -41,28 +41,50 @@ import re
 import sqlite3
 from datetime import datetime, date, time, timedelta
 import hashlib
+import functools
+import itertools
+import threading
 import argparse
 import json
 import csv
 import sys
+import os
 
 HOME = Path.home()
 DB_PATH = HOME / ".calendar_events.db"
+RAW_DUMP_PATH = HOME / "icalbuddy_raw.txt"
 VERSION = "2.0.0"
+ICALBUDDY_TIMEOUT = 30  # seconds allowed for one icalBuddy run
+ICALBUDDY_BUFSIZE = 65536  # stdout pipe buffer: read in working-size chunks, not unbuffered or all at once
+SQL_IN_CHUNK = 500  # stay well under SQLite's default host-parameter limit (999)
+SQL_CACHED_STATEMENTS = 200  # per-connection prepared-statement cache (sqlite3 default is 128)
+
+# Sync statements are module constants so every executemany batch reuses the same cached prepared statement
+SQL_UPSERT_EVENT = (
+    "INSERT INTO events (uid, title, start_time, end_time, first_seen, last_seen, deleted, meeting_link) VALUES (?, ?, ?, ?, ?, ?, 0, ?) "
+    "ON CONFLICT(uid) DO UPDATE SET last_seen=excluded.last_seen, deleted=0, meeting_link=excluded.meeting_link"
+)
+SQL_MARK_DELETED = "UPDATE events SET deleted=1, last_seen=? WHERE uid=?"
+SQL_INSERT_CHANGE = "INSERT INTO changes (ts, action, uid, title, start_time, end_time, meeting_link) VALUES (?, ?, ?, ?, ?, ?, ?)"
+SQL_ACTIVE_BY_TITLE = "SELECT uid, title, start_time, end_time, meeting_link FROM events WHERE title=? AND deleted=0"
 
 # Patterns
-BULLET_PREFIX = re.compile(r"^\s*[•\*]\s*")  # accept only • and * as title bullets
-# date-range like "15 Sep 2025 - 29 Sep 2025" or "2025-09-15 - 2025-09-29"
-DATE_RANGE_RE1 = re.compile(r"(\d{1,2}\s+[A-Za-z]{3,9}\s+\d{4})\s*-\s*(\d{1,2}\s+[A-Za-z]{3,9}\s+\d{4})")
-DATE_RANGE_RE2 = re.compile(r"(\d{4}-\d{2}-\d{2})\s*-\s*(\d{4}-\d{2}-\d{2})")
-# time-range with optional full date prefix like "2025-09-21 11:30 - 12:00" or "11:30 AM - 12:00 PM"
-TIME_RANGE_RE = re.compile(
-    r"(?:(\d{4}-\d{2}-\d{2})\s+)?(\d{1,2}:\d{2}(?:\s*[APMapm\.]{2,4})?)\s*-\s*(\d{1,2}:\d{2}(?:\s*[APMapm\.]{2,4})?)",
-    re.IGNORECASE
-)
-# time-range with "at" keyword like "2025-11-02 at 11:30 AM - 12:00 PM"
-TIME_RANGE_AT_RE = re.compile(
-    r"(\d{4}-\d{2}-\d{2})\s+at\s+(\d{1,2}:\d{2}(?:\s*[APMapm\.]{2,4})?)\s*-\s*(\d{1,2}:\d{2}(?:\s*[APMapm\.]{2,4})?)",
+TITLE_BULLETS = "•*"  # accept only • and * as title bullets (first char of a normalized line)
+CALENDAR_SUFFIX_RE = re.compile(r"\s*\([^)]*@[^)]*\)$")  # trailing "(calendar@account)"
+_TIME = r"\d{1,2}:\d{2}(?:\s*[APMapm\.]{2,4})?"
+# All date/time line formats fused into one alternation so each line is scanned once.
+# At the same position alternatives are tried in order (date ranges, "at" form, time range, bare date).
+LINE_RE = re.compile(
+    # date-range like "15 Sep 2025 - 29 Sep 2025"
+    r"(?P<dr1>(?P<dr1_start>\d{1,2}\s+[A-Za-z]{3,9}\s+\d{4})\s*-\s*(?P<dr1_end>\d{1,2}\s+[A-Za-z]{3,9}\s+\d{4}))"
+    # date-range like "2025-09-15 - 2025-09-29"
+    r"|(?P<dr2>(?P<dr2_start>\d{4}-\d{2}-\d{2})\s*-\s*(?P<dr2_end>\d{4}-\d{2}-\d{2}))"
+    # time-range with "at" keyword like "2025-11-02 at 11:30 AM - 12:00 PM"
+    rf"|(?P<at>(?P<at_date>\d{{4}}-\d{{2}}-\d{{2}})\s+at\s+(?P<at_t1>{_TIME})\s*-\s*(?P<at_t2>{_TIME}))"
+    # time-range with optional full date prefix like "2025-09-21 11:30 - 12:00" or "11:30 AM - 12:00 PM"
+    rf"|(?P<tr>(?:(?P<tr_date>\d{{4}}-\d{{2}}-\d{{2}})\s+)?(?P<tr_t1>{_TIME})\s*-\s*(?P<tr_t2>{_TIME}))"
+    # single all-day date like "2025-09-21"
+    r"|(?P<bare>^(?P<bare_date>\d{4}-\d{2}-\d{2})$)",
     re.IGNORECASE
 )
 
@@ -79,42 +101,91 @@ MEETING_DOMAINS_PRIORITY = [
     "bluejeans.com",
 ]
 
+# One pass over a URL finds every known domain in it. The lookahead makes matches overlap,
+# and at each position the alternation tries domains in priority order.
+MEETING_DOMAIN_RE = re.compile("(?=(" + "|".join(map(re.escape, MEETING_DOMAINS_PRIORITY)) + "))", re.IGNORECASE)
+MEETING_DOMAIN_RANK = {d.lower(): i for i, d in enumerate(MEETING_DOMAINS_PRIORITY)}
+
 def extract_meeting_link_from_lines(lines):
     """
     Given list of text lines (notes/attendees block), return best meeting URL or None.
     - Prefers known meeting provider domains; otherwise returns first http(s) url found.
     """
-    urls = []
-    for L in lines:
-        if not L:
-            continue
-        for m in URL_RE.findall(L):
-            u = m.rstrip(".,;:)'\"")   # strip trailing punctuation
-            urls.append(u)
-    if not urls:
-        return None
-    for domain in MEETING_DOMAINS_PRIORITY:
-        for u in urls:
-            if domain in u.lower():
-                return u
-    return urls[0]
+    best_url = None
+    best_rank = len(MEETING_DOMAINS_PRIORITY)
+    first_url = None
+    for m in URL_RE.finditer("\n".join(L for L in lines if L)):
+        u = m.group(0).rstrip(".,;:)'\"")   # strip trailing punctuation
+        if first_url is None:
+            first_url = u
+        for dm in MEETING_DOMAIN_RE.finditer(u):
+            rank = MEETING_DOMAIN_RANK[dm.group(1).lower()]
+            if rank < best_rank:
+                best_url, best_rank = u, rank
+    return best_url or first_url
 
 def normalize_spaces(s: str) -> str:
+    """Collapse whitespace runs to one ' ' and strip (single line)."""
     if s is None:
         return s
-    s = s.replace("\u00A0", " ")
-    s = s.replace("\u202F", " ")
-    s = s.replace("\u2009", " ")
-    s = re.sub(r"[ \t\r\f\v]+", " ", s)
-    return s
+    # str.split() already treats NBSP (U+00A0), narrow NBSP (U+202F), thin space (U+2009)
+    # and \t\r\f\v as whitespace, so one split/join pass covers them without a translate() copy
+    return " ".join(s.split())
+
+def _icalbuddy_lines(cmd, result):
+    """
+    Run icalBuddy and yield its stdout lines as they arrive.
+    When output is exhausted, fills result["returncode"] and result["stderr"].
+    The whole run is bounded by ICALBUDDY_TIMEOUT (a timer kills a hung process).
+    """
+    try:
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, bufsize=ICALBUDDY_BUFSIZE)
+    except FileNotFoundError:
+        raise SystemExit("icalBuddy not found. Install with: brew install ical-buddy")
+    timed_out = threading.Event()
+
+    def kill():
+        timed_out.set()
+        proc.kill()
+
+    # drain stderr concurrently, as communicate() did: a full stderr pipe would block the child
+    stderr_chunks = []
+    stderr_reader = threading.Thread(target=lambda: stderr_chunks.append(proc.stderr.read()), daemon=True)
+    stderr_reader.start()
+    timer = threading.Timer(ICALBUDDY_TIMEOUT, kill)
+    timer.start()
+    try:
+        for line in proc.stdout:
+            yield line
+        result["returncode"] = proc.wait()
+        stderr_reader.join()
+        result["stderr"] = "".join(stderr_chunks)
+    finally:
+        timer.cancel()
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+        stderr_reader.join(timeout=1)
+        proc.stdout.close()
+        if not stderr_reader.is_alive():
+            proc.stderr.close()
+    if timed_out.is_set():
+        raise SystemExit(f"icalBuddy command timed out after {ICALBUDDY_TIMEOUT} seconds")
+
+def _close_quietly(f):
+    """Close a debug file; a failing flush must never abort a sync."""
+    try:
+        f.close()
+    except Exception:
+        pass
 
 def run_icalbuddy(write_raw=False, lookback_days=0):
     """
-    Call icalBuddy with absolute date/time (no relative dates) and return normalized lines.
-    Uses the two-arg form for range with lookback support.
+    Call icalBuddy with absolute date/time (no relative dates) and yield raw output lines as they arrive.
+    Uses the two-arg form for range with lookback support. Lines are not normalized (parse_events does that).
     
     Args:
-        write_raw: Whether to write raw output to file for debugging
+        write_raw: Whether to tee raw output to RAW_DUMP_PATH for debugging
         lookback_days: Number of days to look back from today (0 = today only)
     """
     today = date.today()
@@ -124,42 +195,66 @@ def run_icalbuddy(write_raw=False, lookback_days=0):
     end_str = today.strftime("%Y-%m-%d")
     
     cmd = ["icalBuddy", "-nrd", "-df", "%Y-%m-%d", "-tf", "%I:%M %p", f"eventsFrom:{start_str}", f"to:{end_str}"]
-    try:
-        rc = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-    except subprocess.TimeoutExpired:
-        raise SystemExit("icalBuddy command timed out after 30 seconds")
-    except FileNotFoundError:
-        raise SystemExit("icalBuddy not found. Install with: brew install ical-buddy")
-    
-    used = f"eventsFrom:{start_str} to:{end_str}"
-    if rc.returncode != 0 or not rc.stdout.strip():
+    result = {}
+    lines = _icalbuddy_lines(cmd, result)
+    # hold back leading blank lines until we know the range query produced something
+    head = []
+    for line in lines:
+        head.append(line)
+        if line.strip():
+            break
+    else:
         # fallback to today only if range fails
         cmd2 = ["icalBuddy", "-nrd", "-df", "%Y-%m-%d", "-tf", "%I:%M %p", "eventsToday"]
-        try:
-            rc = subprocess.run(cmd2, capture_output=True, text=True, timeout=30)
-        except subprocess.TimeoutExpired:
-            raise SystemExit("icalBuddy command timed out after 30 seconds")
-        
-        used = "eventsToday (fallback)"
-        if rc.returncode != 0:
-            raise SystemExit(f"icalBuddy failed: {rc.stderr.strip()}")
-    
-    out = rc.stdout
+        result = {}
+        head = []
+        lines = _icalbuddy_lines(cmd2, result)
+
+    raw = None
     if write_raw:
+        fd = None
         try:
-            Path.home().joinpath("icalbuddy_raw.txt").write_text(out, encoding="utf-8")
+            # owner-only: the dump holds calendar titles, notes and meeting links.
+            # os.open's mode only applies on create, so fchmod an existing (older, umask-mode) dump too.
+            fd = os.open(RAW_DUMP_PATH, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            os.fchmod(fd, 0o600)
+            raw = open(fd, "w", encoding="utf-8")
         except Exception:
-            pass
-    return normalize_spaces(out).splitlines()
+            if fd is not None:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+    try:
+        for line in itertools.chain(head, lines):
+            if raw is not None:
+                try:
+                    raw.write(line)
+                except Exception:
+                    _close_quietly(raw)
+                    raw = None
+            yield line
+    finally:
+        if raw is not None:
+            _close_quietly(raw)
+    if result.get("returncode"):
+        raise SystemExit(f"icalBuddy failed: {result['stderr'].strip()}")
 
 # date parsing helpers
+@functools.lru_cache(maxsize=4096)
 def try_parse_date_to_iso(s: str):
     """Parse dates like '15 Sep 2025' or '2025-09-15' into 'YYYY-MM-DD' (string)"""
     if not s:
         return None
     s = s.strip()
+    # fast path: icalBuddy is run with -df %Y-%m-%d, so this is almost always already ISO
+    if len(s) == 10 and s[4] == "-" and s[7] == "-" and s[:4].isdigit() and s[5:7].isdigit() and s[8:].isdigit():
+        try:
+            return date(int(s[:4]), int(s[5:7]), int(s[8:])).isoformat()
+        except ValueError:
+            return None
     s = re.sub(r'(\d+)(st|nd|rd|th)', r'\1', s, flags=re.IGNORECASE)
-    fmts = ["%d %b %Y", "%d %B %Y", "%Y-%m-%d", "%b %d %Y", "%B %d %Y"]
+    fmts = ["%Y-%m-%d", "%d %b %Y", "%d %B %Y", "%b %d %Y", "%B %d %Y"]
     for f in fmts:
         try:
             return datetime.strptime(s, f).date().isoformat()
@@ -176,20 +271,24 @@ def parse_time_with_optional_am_pm(time_str: str):
     """
     Parse time fragments like "11:30", "11:30 AM", "11:30PM" into (hour, minute).
     Returns (hour, minute) in 24-hour clock.
+    Hand-rolled (no strptime): input is always "H:MM" plus an optional AM/PM suffix.
     """
-    t = time_str.strip().replace(".", "")
-    # try with AM/PM
-    for fmt in ("%I:%M %p", "%I:%M%p", "%H:%M"):
-        try:
-            dt = datetime.strptime(t.upper(), fmt)
-            return dt.hour, dt.minute
-        except Exception:
-            pass
-    # fallback: parse "HH:MM" naive
-    m = re.match(r"^(\d{1,2}):(\d{2})", t)
-    if m:
-        return int(m.group(1)), int(m.group(2))
-    return None, None
+    t = time_str.strip().replace(".", "").upper()
+    suffix = None
+    if t.endswith("AM") or t.endswith("PM"):
+        suffix = t[-2:]
+        t = t[:-2]
+    h, _, rest = t.partition(":")
+    try:
+        h = int(h)
+        m = int(rest[:2])
+    except ValueError:
+        return None, None
+    if suffix == "PM" and h < 12:
+        h += 12
+    elif suffix == "AM" and h == 12:
+        h = 0
+    return h, m
 
 def to_iso_datetime_str(date_iso: str, hour: int, minute: int):
     """Return 'YYYY-MM-DDThh:mm:ss' string using given date and hour/minute (no timezone changes)."""
@@ -212,6 +311,9 @@ def parse_events(lines):
     cur_start = None
     cur_end = None
     buffer_lines = []
+    # loop invariants, bound once: undated time ranges all belong to today
+    today_iso = date.today().isoformat()
+    line_search = LINE_RE.search
 
     def commit():
         nonlocal cur_title, cur_start, cur_end, buffer_lines
@@ -231,12 +333,12 @@ def parse_events(lines):
             continue
         line = normalize_spaces(line)
 
-        # Title lines
-        if BULLET_PREFIX.match(line):
+        # Title lines (normalize_spaces has stripped leading whitespace, so one char test replaces a regex)
+        if line[0] in TITLE_BULLETS:
             if cur_title is not None:
                 commit()
-            title = BULLET_PREFIX.sub("", line).strip()
-            title = re.sub(r"\s*\([^)]*@[^)]*\)$", "", title).strip()
+            title = line[1:].strip()
+            title = CALENDAR_SUFFIX_RE.sub("", title).strip()
             cur_title = title
             cur_start = None
             cur_end = None
@@ -247,62 +349,44 @@ def parse_events(lines):
         if cur_title is not None:
             buffer_lines.append(line)
 
-            m1 = DATE_RANGE_RE1.search(line)
-            if m1:
-                s_iso = try_parse_date_to_iso(m1.group(1))
-                e_iso = try_parse_date_to_iso(m1.group(2))
-                if s_iso and e_iso:
-                    cur_start = f"{s_iso}T00:00:00"
-                    cur_end = f"{e_iso}T23:59:59"
-                    continue
+            m = line_search(line)
+            if not m:
+                continue
+            kind = m.lastgroup
 
-            m2 = DATE_RANGE_RE2.search(line)
-            if m2:
-                s_iso = try_parse_date_to_iso(m2.group(1))
-                e_iso = try_parse_date_to_iso(m2.group(2))
+            if kind == "dr1" or kind == "dr2":
+                s_iso = try_parse_date_to_iso(m.group(kind + "_start"))
+                e_iso = try_parse_date_to_iso(m.group(kind + "_end"))
                 if s_iso and e_iso:
                     cur_start = f"{s_iso}T00:00:00"
                     cur_end = f"{e_iso}T23:59:59"
-                    continue
-
-            # Check for "YYYY-MM-DD at HH:MM AM/PM - HH:MM AM/PM" format first
-            mt_at = TIME_RANGE_AT_RE.search(line)
-            if mt_at:
-                date_prefix = mt_at.group(1)
-                t1 = mt_at.group(2)
-                t2 = mt_at.group(3)
-                date_iso = try_parse_date_to_iso(date_prefix)
-                h1, m1 = parse_time_with_optional_am_pm(t1)
-                h2, m2 = parse_time_with_optional_am_pm(t2)
+
+            elif kind == "at":
+                # "YYYY-MM-DD at HH:MM AM/PM - HH:MM AM/PM"
+                date_iso = try_parse_date_to_iso(m.group("at_date"))
+                h1, m1 = parse_time_with_optional_am_pm(m.group("at_t1"))
+                h2, m2 = parse_time_with_optional_am_pm(m.group("at_t2"))
                 if date_iso and h1 is not None and h2 is not None:
                     cur_start = to_iso_datetime_str(date_iso, h1, m1)
                     cur_end = to_iso_datetime_str(date_iso, h2, m2)
-                    continue
-
-            # Check for regular time range format
-            mt = TIME_RANGE_RE.search(line)
-            if mt:
-                date_prefix = mt.group(1)
-                t1 = mt.group(2)
-                t2 = mt.group(3)
+
+            elif kind == "tr":
+                # regular time range, optionally prefixed by a date
+                date_prefix = m.group("tr_date")
                 if date_prefix:
                     date_iso = try_parse_date_to_iso(date_prefix)
                 else:
-                    date_iso = date.today().isoformat()
-                h1, m1 = parse_time_with_optional_am_pm(t1)
-                h2, m2 = parse_time_with_optional_am_pm(t2)
+                    date_iso = today_iso
+                h1, m1 = parse_time_with_optional_am_pm(m.group("tr_t1"))
+                h2, m2 = parse_time_with_optional_am_pm(m.group("tr_t2"))
                 if h1 is not None and h2 is not None:
                     cur_start = to_iso_datetime_str(date_iso, h1, m1)
                     cur_end = to_iso_datetime_str(date_iso, h2, m2)
-                    continue
 
-            if re.match(r"^\d{4}-\d{2}-\d{2}$", line.strip()):
-                d = line.strip()
+            else:
+                d = m.group("bare_date")
                 cur_start = f"{d}T00:00:00"
                 cur_end = f"{d}T23:59:59"
-                continue
-
-            continue
 
     if cur_title is not None:
         commit()
@@ -311,6 +395,15 @@ def parse_events(lines):
 # DB helpers & migrations
 def init_db(conn):
     c = conn.cursor()
+    # WAL + relaxed fsync: safe for a single-user, cron-driven DB and avoids an fsync per sync
+    c.execute("PRAGMA journal_mode=WAL")
+    c.execute("PRAGMA synchronous=NORMAL")
+    c.execute("PRAGMA wal_autocheckpoint=1000")
+    c.execute("PRAGMA temp_store=MEMORY")
+    c.execute("PRAGMA mmap_size=268435456")
+    c.execute("PRAGMA cache_size=-20000")
+    # A brand-new DB gets the current schema below, so it needs no column migrations
+    fresh = c.execute("SELECT count(*) FROM sqlite_master WHERE type='table' AND name IN ('events', 'changes')").fetchone()[0] == 0
     # Create events table if not exists (with start_time and end_time)
     c.execute("""
     CREATE TABLE IF NOT EXISTS events (
@@ -335,54 +428,56 @@ def init_db(conn):
         end_time TEXT,
         meeting_link TEXT
     )""")
+    # Ensure columns exist for older DBs (safe additive); before indexes, which may reference them.
+    # One table_info read per table, shared by all of that table's checks.
+    if not fresh:
+        events_cols = table_columns(conn, "events")
+        for column in ("start_time", "end_time", "meeting_link"):
+            ensure_column(conn, "events", column, events_cols)
+        changes_cols = table_columns(conn, "changes")
+        for column in ("start_time", "end_time", "meeting_link"):
+            ensure_column(conn, "changes", column, changes_cols)
     # Add indexes for better performance
     c.execute("CREATE INDEX IF NOT EXISTS idx_events_start_time ON events(start_time)")
+    # (deleted, start_time): active-event date queries range-scan start_time in order, with no temp sort
+    c.execute("CREATE INDEX IF NOT EXISTS idx_events_active_start ON events(deleted, start_time)")
+    c.execute("DROP INDEX IF EXISTS idx_events_end_time")  # never chosen by the planner; only cost writes
     c.execute("CREATE INDEX IF NOT EXISTS idx_events_deleted ON events(deleted)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_events_title_active ON events(title) WHERE deleted=0")
     c.execute("CREATE INDEX IF NOT EXISTS idx_changes_ts ON changes(ts)")
     conn.commit()
-    
-    # Ensure columns exist for older DBs (safe additive)
-    ensure_column(conn, "events", "start_time")
-    ensure_column(conn, "events", "end_time")
-    ensure_column(conn, "events", "meeting_link")
-    ensure_column(conn, "changes", "start_time")
-    ensure_column(conn, "changes", "end_time")
-    ensure_column(conn, "changes", "meeting_link")
-    conn.commit()
 
-def ensure_column(conn, table, column):
-    """Add column if missing (no-op if exists)."""
-    cur = conn.cursor()
-    cur.execute(f"PRAGMA table_info({table})")
-    cols = [r[1] for r in cur.fetchall()]
-    if column not in cols:
-        cur.execute(f"ALTER TABLE {table} ADD COLUMN {column} TEXT")
+def table_columns(conn, table):
+    """Return the set of column names in table."""
+    return {r[1] for r in conn.execute(f"PRAGMA table_info({table})")}
 
-def load_db_map(conn):
-    c = conn.cursor()
-    rows = c.execute("SELECT uid, title, start_time, end_time, first_seen, last_seen, deleted, meeting_link FROM events").fetchall()
-    return {
-        r[0]: {
-            "uid": r[0],
-            "title": r[1],
-            "start_time": r[2],
-            "end_time": r[3],
-            "first_seen": r[4],
-            "last_seen": r[5],
-            "deleted": r[6],
-            "meeting_link": r[7] if len(r) > 7 else None,
-        }
-        for r in rows
-    }
-
-def record_change(conn, action, uid, title, start_time, end_time, meeting_link):
-    ts = datetime.now().isoformat()
-    conn.execute(
-        "INSERT INTO changes (ts, action, uid, title, start_time, end_time, meeting_link) VALUES (?, ?, ?, ?, ?, ?, ?)",
-        (ts, action, uid, title, start_time, end_time, meeting_link),
-    )
+def ensure_column(conn, table, column, existing=None):
+    """
+    Add column if missing (no-op if exists).
+    Pass existing (from table_columns) when checking several columns of one table; it is updated in place.
+    """
+    if existing is None:
+        existing = table_columns(conn, table)
+    if column not in existing:
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} TEXT")
+        existing.add(column)
+
+def load_existing_uids(conn, uids):
+    """Return the subset of uids already stored in events (active or deleted)."""
+    uids = list(uids)
+    found = set()
+    for i in range(0, len(uids), SQL_IN_CHUNK):
+        chunk = uids[i:i + SQL_IN_CHUNK]
+        placeholders = ",".join("?" * len(chunk))
+        found.update(r[0] for r in conn.execute(f"SELECT uid FROM events WHERE uid IN ({placeholders})", chunk))
+    return found
+
+def load_active_by_title(conn, title):
+    """Return active (uid, title, start_time, end_time, meeting_link) rows with the given title."""
+    return conn.execute(SQL_ACTIVE_BY_TITLE, (title,)).fetchall()
 
 def uid_for(title, start_time, end_time):
+    """Stable event id: SHA1 of title||start||end. Stored in the DB, so the format must not change."""
     raw = (title or "") + "||" + (start_time or "") + "||" + (end_time or "")
     return hashlib.sha1(raw.encode("utf-8")).hexdigest()
 
@@ -390,79 +485,96 @@ def process_and_sync(events, conn, dry_run=False, lookback_mode=False):
     """
     events: list of (title, start_time_iso, end_time_iso, meeting_link)
     lookback_mode: if True, don't mark events as removed (since we're not syncing all current events)
+
+    Events are classified in a single pass, then written in one explicit
+    transaction using executemany (one statement per kind of write).
+    Requires SQLite 3.24+ for the ON CONFLICT upsert.
     """
     now = datetime.now().isoformat()
-    db_map = load_db_map(conn)
-    current_uids = set()
-
+    # hash each distinct (title, start, end) once; lookbacks repeat the same event
+    uid_by_key = {}
+    keyed = []
     for title, s_iso, e_iso, mlink in events:
-        uid = uid_for(title, s_iso, e_iso)
-        current_uids.add(uid)
-        
-        if uid in db_map:
-            # Event already exists, just update last_seen and ensure it's not deleted
-            if not dry_run:
-                conn.execute("UPDATE events SET last_seen=?, deleted=0, meeting_link=? WHERE uid=?", (now, mlink, uid))
+        key = (title, s_iso, e_iso)
+        uid = uid_by_key.get(key)
+        if uid is None:
+            uid = uid_by_key[key] = uid_for(title, s_iso, e_iso)
+        keyed.append((uid, title, s_iso, e_iso, mlink))
+    existing_uids = load_existing_uids(conn, uid_by_key.values())
+    same_title_cache = {}
+    # every event in this sync stays active, so none of them can be superseded by a same-title sibling
+    current_uids = set(uid_by_key.values())
+    to_upsert = []      # (uid, title, start_time, end_time, first_seen, last_seen, meeting_link)
+    to_supersede = []   # (last_seen, uid) for rows to mark deleted
+    changes_batch = []  # (ts, action, uid, title, start_time, end_time, meeting_link)
+
+    def supersede(row, action):
+        # row: (uid, title, start_time, end_time, meeting_link)
+        to_supersede.append((now, row[0]))
+        changes_batch.append((now, action) + tuple(row))
+
+    for uid, title, s_iso, e_iso, mlink in keyed:
+        if uid in existing_uids:
+            # Event already exists, just update last_seen and ensure it's not deleted (upsert conflict path)
+            to_upsert.append((uid, title, s_iso, e_iso, now, now, mlink))
         else:
             # New event - check for existing records with same title (active) -> treat as update if times differ
-            existing_same_title = [r for r in db_map.values() if r["title"] == title and r["deleted"] == 0]
-            if existing_same_title:
-                for old in existing_same_title:
-                    if not dry_run:
-                        conn.execute("UPDATE events SET deleted=1, last_seen=? WHERE uid=?", (now, old["uid"]))
-                        record_change(conn, "updated-old-marked-deleted", old["uid"], old["title"], old["start_time"], old["end_time"], old.get("meeting_link"))
-                
-                # Use INSERT OR REPLACE to handle potential constraint violations
-                if not dry_run:
-                    conn.execute(
-                        "INSERT OR REPLACE INTO events (uid, title, start_time, end_time, first_seen, last_seen, deleted, meeting_link) VALUES (?, ?, ?, ?, ?, ?, 0, ?)",
-                        (uid, title, s_iso, e_iso, now, now, mlink),
-                    )
-                    record_change(conn, "added (updated)", uid, title, s_iso, e_iso, mlink)
-            else:
-                # Completely new event - use INSERT OR REPLACE to be safe
-                if not dry_run:
-                    conn.execute(
-                        "INSERT OR REPLACE INTO events (uid, title, start_time, end_time, first_seen, last_seen, deleted, meeting_link) VALUES (?, ?, ?, ?, ?, ?, 0, ?)",
-                        (uid, title, s_iso, e_iso, now, now, mlink),
-                    )
-                    record_change(conn, "added", uid, title, s_iso, e_iso, mlink)
+            # (all reads happen before any write, so this reflects the DB as it was before this sync)
+            if title not in same_title_cache:
+                same_title_cache[title] = [r for r in load_active_by_title(conn, title) if r[0] not in current_uids]
+            existing_same_title = same_title_cache[title]
+            for old in existing_same_title:
+                supersede(old, "updated-old-marked-deleted")
+            to_upsert.append((uid, title, s_iso, e_iso, now, now, mlink))
+            changes_batch.append((now, "added (updated)" if existing_same_title else "added", uid, title, s_iso, e_iso, mlink))
 
     # Only mark events as removed if we're not in lookback mode
     # In lookback mode, we're syncing historical events, not current state
     if not lookback_mode:
-        for uid, row in db_map.items():
-            if row["deleted"] == 0 and uid not in current_uids:
-                if not dry_run:
-                    conn.execute("UPDATE events SET deleted=1, last_seen=? WHERE uid=?", (now, uid))
-                    record_change(conn, "removed", uid, row["title"], row["start_time"], row["end_time"], row.get("meeting_link"))
+        for row in conn.execute("SELECT uid, title, start_time, end_time, meeting_link FROM events WHERE deleted=0"):
+            if row[0] not in current_uids:
+                supersede(row, "removed")
+
+    if dry_run:
+        return
 
-    if not dry_run:
-        conn.commit()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.executemany(SQL_MARK_DELETED, to_supersede)
+        conn.executemany(SQL_UPSERT_EVENT, to_upsert)
+        conn.executemany(SQL_INSERT_CHANGE, changes_batch)
+    except Exception:
+        conn.rollback()
+        raise
+    conn.commit()
 
 # printing helpers (updated headers to include start_time/end_time)
 def rows_to_table(rows, headers):
-    col_widths = [len(h) for h in headers]
-    for r in rows:
-        for i, cell in enumerate(r):
-            s = "" if cell is None else str(cell)
-            if len(s) > col_widths[i]:
-                col_widths[i] = len(s)
+    str_rows = [["" if c is None else str(c) for c in r] for r in rows]
+    # transpose once so the width scan runs in max()/map() rather than a Python loop
+    cols = list(zip(*str_rows)) or [()] * len(headers)
+    col_widths = [max(len(h), max(map(len, col), default=0)) for h, col in zip(headers, cols)]
     sep = "  "
     lines = []
-    header_line = sep.join(h.ljust(col_widths[i]) for i, h in enumerate(headers))
+    header_line = sep.join([h.ljust(w) for h, w in zip(headers, col_widths)])
     lines.append(header_line)
-    lines.append(sep.join("-" * col_widths[i] for i in range(len(headers))))
-    for r in rows:
-        lines.append(sep.join((("" if c is None else str(c)).ljust(col_widths[i])) for i, c in enumerate(r)))
+    lines.append(sep.join(["-" * w for w in col_widths]))
+    for r in str_rows:
+        lines.append(sep.join([c.ljust(w) for c, w in zip(r, col_widths)]))
     return "\n".join(lines)
 
 def print_table(rows, headers):
     print(rows_to_table(rows, headers))
 
 def print_json(rows, headers):
-    out = [dict(zip(headers, r)) for r in rows]
-    print(json.dumps(out, indent=2, ensure_ascii=False))
+    # stream one object at a time; output matches json.dumps(list, indent=2)
+    out = sys.stdout
+    first = True
+    for r in rows:
+        out.write("[\n  " if first else ",\n  ")
+        out.write(json.dumps(dict(zip(headers, r)), indent=2, ensure_ascii=False).replace("\n", "\n  "))
+        first = False
+    out.write("[]\n" if first else "\n]\n")
 
 def print_csv(rows, headers):
     w = csv.writer(sys.stdout)
@@ -473,86 +585,79 @@ def print_csv(rows, headers):
 # queries
 def events_on_date_query(conn, target_date):
     """
-    Return rows for events that overlap target_date.
+    Return a cursor over events that overlap target_date (rows stream as they are read).
     The start_time/end_time are stored as 'YYYY-MM-DDThh:mm:ss' (or 'YYYY-MM-DDT00:00:00' for all-day).
-    We use date(start_time) and date(end_time) to compare.
+    Those strings sort chronologically, so we compare them directly against the day's
+    first/last second; keeping start_time bare lets SQLite range-scan idx_events_active_start.
     """
-    c = conn.cursor()
-    rows = c.execute(
+    return conn.execute(
         """
         SELECT title, start_time, end_time, meeting_link
         FROM events
         WHERE deleted=0
-          AND date(start_time) <= date(?)
-          AND date(end_time)   >= date(?)
+          AND start_time <= ? || 'T23:59:59'
+          AND end_time   >= ? || 'T00:00:00'
         ORDER BY start_time
         """,
         (target_date, target_date)
-    ).fetchall()
-    return rows
+    )
 
 def events_in_range_query(conn, from_date=None, to_date=None):
     """
-    Return rows for events that overlap the [from_date, to_date] range (both inclusive).
+    Return a cursor over events that overlap the [from_date, to_date] range (both inclusive).
     If from_date is None -> treat as unbounded past. If to_date None -> unbounded future.
     """
-    c = conn.cursor()
     if from_date and to_date:
-        rows = c.execute(
+        return conn.execute(
             """
             SELECT title, start_time, end_time, meeting_link
             FROM events
             WHERE deleted=0
-              AND date(start_time) <= date(?)
-              AND date(end_time)   >= date(?)
+              AND start_time <= ? || 'T23:59:59'
+              AND end_time   >= ? || 'T00:00:00'
             ORDER BY start_time
             """,
             (to_date, from_date)
-        ).fetchall()
-        return rows
+        )
     elif from_date:
-        rows = c.execute(
+        return conn.execute(
             """
             SELECT title, start_time, end_time, meeting_link
             FROM events
             WHERE deleted=0
-              AND date(end_time) >= date(?)
+              AND end_time >= ? || 'T00:00:00'
             ORDER BY start_time
             """,
             (from_date,)
-        ).fetchall()
-        return rows
+        )
     elif to_date:
-        rows = c.execute(
+        return conn.execute(
             """
             SELECT title, start_time, end_time, meeting_link
             FROM events
             WHERE deleted=0
-              AND date(start_time) <= date(?)
+              AND start_time <= ? || 'T23:59:59'
             ORDER BY start_time
             """,
             (to_date,)
-        ).fetchall()
-        return rows
+        )
     else:
         # no bounds -> return all active events
-        return c.execute("SELECT title, start_time, end_time, meeting_link FROM events WHERE deleted=0 ORDER BY start_time").fetchall()
+        return conn.execute("SELECT title, start_time, end_time, meeting_link FROM events WHERE deleted=0 ORDER BY start_time")
 
 def get_changes(conn, since_ts=None):
-    c = conn.cursor()
+    """Return a cursor over change rows (oldest first), optionally only those since since_ts."""
     if since_ts:
-        rows = c.execute("SELECT ts, action, uid, title, start_time, end_time, meeting_link FROM changes WHERE ts >= ? ORDER BY ts", (since_ts,)).fetchall()
+        return conn.execute("SELECT ts, action, uid, title, start_time, end_time, meeting_link FROM changes WHERE ts >= ? ORDER BY ts, id", (since_ts,))
     else:
-        rows = c.execute("SELECT ts, action, uid, title, start_time, end_time, meeting_link FROM changes ORDER BY ts").fetchall()
-    return rows
+        return conn.execute("SELECT ts, action, uid, title, start_time, end_time, meeting_link FROM changes ORDER BY ts, id")
 
 def show_db(conn):
-    c = conn.cursor()
     print("=== events ===")
-    for r in c.execute("SELECT uid, title, start_time, end_time, first_seen, last_seen, meeting_link, deleted FROM events ORDER BY first_seen"):
+    for r in conn.execute("SELECT uid, title, start_time, end_time, first_seen, last_seen, meeting_link, deleted FROM events ORDER BY first_seen"):
         print(r)
     print("\n=== changes (last 50) ===")
-    for r in c.execute("SELECT id, ts, action, uid, title, start_time, end_time, meeting_link FROM changes ORDER BY id DESC LIMIT 50"):
+    for r in conn.execute("SELECT id, ts, action, uid, title, start_time, end_time, meeting_link FROM changes ORDER BY id DESC LIMIT 50"):
         print(r)
 
 # CLI and main
@@ -617,6 +722,7 @@ CalendarBuddy v{VERSION} - https://github.com/yourusername/CalendarBuddy
     p.add_argument("--since", help="Filter changes since ISO timestamp or '<Nh' (hours). Only for --print-changes.")
     p.add_argument("--show-db", action="store_true", help="Debug: dump raw DB rows.")
     p.add_argument("--dry-run", action="store_true", help="Run sync logic but don't write DB/changes (useful for testing).")
+    p.add_argument("--debug-raw", action="store_true", help=f"Debug: also write raw icalBuddy output to {RAW_DUMP_PATH}.")
     p.add_argument("--lookback", type=int, default=0, help="Number of days to look back from today for syncing (default: 0, today only).")
     args = p.parse_args()
 
@@ -634,7 +740,8 @@ CalendarBuddy v{VERSION} - https://github.com/yourusername/CalendarBuddy
         print("Error: --to must be YYYY-MM-DD", file=sys.stderr)
         sys.exit(1)
 
-    conn = sqlite3.connect(str(DB_PATH))
+    conn = sqlite3.connect(str(DB_PATH), cached_statements=SQL_CACHED_STATEMENTS)
+    conn.isolation_level = None  # autocommit; process_and_sync manages its own transaction
     init_db(conn)
 
     # Handle backward compatibility
@@ -688,15 +795,14 @@ CalendarBuddy v{VERSION} - https://github.com/yourusername/CalendarBuddy
             conn.close()
             return
 
-    # Default: fetch and sync
+    # Default: fetch and sync (icalBuddy output is parsed as it streams in)
     try:
-        raw_lines = run_icalbuddy(write_raw=True, lookback_days=args.lookback)
+        events = parse_events(run_icalbuddy(write_raw=args.debug_raw, lookback_days=args.lookback))
     except SystemExit as e:
         print("Error running icalBuddy:", e, file=sys.stderr)
         conn.close()
         sys.exit(1)
 
-    events = parse_events(raw_lines)
     lookback_mode = args.lookback > 0
     process_and_sync(events, conn, dry_run=args.dry_run, lookback_mode=lookback_mode)
     conn.close()